@@ -1,18 +1,28 @@
 #Imports and dependencies
 # Standard
+import copy
 import json
+import logging
 import os
-import queue
 import sys
 import threading
 import time
-from collections import defaultdict
+import zlib
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import pkgutil
 
 # Third-party
 import numpy as np
+import scipy.linalg
+import scipy.sparse
 from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # Flask < 2.2 has no JSON providers
+    DefaultJSONProvider = None
 
 # TOPS 
 import tops.dynamic as dps
@@ -20,8 +30,31 @@ import tops.modal_analysis as dps_mdl
 import tops.solvers as dps_sol
 import importlib
 
+# Optional accelerator
+try:
+    import orjson
+except ImportError:  # orjson is optional, falls back to the stdlib json encoder
+    orjson = None
+
 #Flask config
 app = Flask(__name__)
+
+# Parse request bodies with orjson when it is available. Its decode errors are
+# ValueErrors, so request.get_json() still answers malformed JSON with a 400.
+if orjson is not None and DefaultJSONProvider is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """JSON provider that decodes with orjson and encodes like the default provider."""
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+
+# Keep response keys in insertion order instead of sorting them on every jsonify call
+if hasattr(app, 'json') and hasattr(app.json, 'sort_keys'):
+    app.json.sort_keys = False
+else:
+    app.config['JSON_SORT_KEYS'] = False
 CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:3000"],
@@ -32,12 +65,18 @@ CORS(app, resources={
 
 # GLOBAL STATE AND DEFAULT PARAMETERS
 
+logger = logging.getLogger(__name__)
+
 # Global state management
 simulation_state = {
-    'running': False,  # Flag to track if simulation is currently running
     'results': defaultdict(list)  # Store simulation results
 }
 
+# Set while a simulation is running. Checked and set under the lock, so two
+# start requests cannot both start a simulation.
+simulation_running = threading.Event()
+_simulation_start_lock = threading.Lock()
+
 # Default simulation parameters
 sim_parameters = {
     'network': 'k2a',
@@ -49,8 +88,68 @@ sim_parameters = {
     't_end': 20  # Default simulation time
 }
 
-# Queue for real-time simulation updates to frontend
-update_queue = queue.Queue()
+# Size of the per-client queues for real-time simulation updates to frontend, bounded
+# so a stalled client cannot make them grow without limit
+UPDATE_QUEUE_SIZE = 64
+
+# Compression level of gzip-encoded update streams, the lowest level already
+# compresses the repetitive JSON several times over at little CPU cost
+SSE_GZIP_LEVEL = 1
+
+# Comment frame sent on idle update streams so proxies and clients keep the connection open,
+# every SSE_KEEPALIVE_SEC seconds without updates. Well below the usual proxy read timeouts
+# (60 s in nginx), updates themselves are sent as soon as they are published.
+SSE_KEEPALIVE = b": keepalive\n\n"
+SSE_KEEPALIVE_SEC = 15
+
+# Minimum wall-clock time between published step updates (20 Hz)
+STEP_PUBLISH_INTERVAL = 0.05
+
+# Step quantities that are not plotted live and only sent with the complete results
+LIVE_FRAME_EXCLUDE = frozenset({'x'})
+
+# Networks with up to this many buses in the reduced system solve the network equations
+# with a dense solver, larger ones keep the sparse solver in TOPS
+ALGEBRAIC_DENSE_MAX_BUSES = 200
+
+# Batch simulations run in a pool of worker processes, created on the first batch request.
+# Processes rather than threads, the simulation is pure Python and holds the GIL.
+BATCH_MAX_WORKERS = os.cpu_count() or 1
+# Maximum number of scenarios per batch request, the request blocks until all of them are done
+BATCH_MAX_SCENARIOS = 32
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+# Loaded network models, {network_name: (module mtime, model dict)}
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+
+
+def load_network_model(network_name):
+    """
+    Load the model dictionary of a TOPS network.
+    
+    The module is only re-imported when its source file has changed since the
+    last load. A deep copy is returned so callers can restructure it freely.
+    
+    Args:
+        network_name: Name of the module in tops.ps_models
+    
+    Returns:
+        The model dictionary returned by the module's load() function
+    """
+    with _model_cache_lock:
+        model_module = importlib.import_module(f"tops.ps_models.{network_name}")
+        mtime = os.path.getmtime(model_module.__file__)
+        cached = _model_cache.get(network_name)
+        if cached is None or cached[0] != mtime:
+            # On a cold cache the module was just imported, it only needs a reload when it changed
+            if cached is not None:
+                importlib.reload(model_module)
+            cached = (mtime, model_module.load())
+            _model_cache[network_name] = cached
+    return copy.deepcopy(cached[1])
+
 
 @app.route('/api/networks', methods=['GET'])
 def get_available_networks():
@@ -67,9 +166,7 @@ def get_available_networks():
 def get_network_data(network_name):
     """Return basic node/link information for the specified network."""
     try:
-        model_module = importlib.import_module(f"tops.ps_models.{network_name}")
-        importlib.reload(model_module)
-        model = model_module.load()
+        model = load_network_model(network_name)
 
         nodes = []
         links = []
@@ -116,6 +213,16 @@ def get_network_data(network_name):
 
 
 #he,lper functions
+def _pair_complex(real, imag, ndim):
+    """Combine nested lists of real and imaginary parts into nested lists of {real, imag} dicts."""
+    if ndim == 1:
+        return [{'real': re, 'imag': im} for re, im in zip(real, imag)]
+    if ndim == 2:
+        return [[{'real': re, 'imag': im} for re, im in zip(real_row, imag_row)]
+                for real_row, imag_row in zip(real, imag)]
+    return [_pair_complex(real_row, imag_row, ndim - 1) for real_row, imag_row in zip(real, imag)]
+
+
 def convert_to_serializable(obj):
     """
     Convert complex Python objects to JSON serializable format.
@@ -126,169 +233,651 @@ def convert_to_serializable(obj):
     Returns:
         JSON serializable version of the object
     """
-    if isinstance(obj, complex):
+    if isinstance(obj, (complex, np.complexfloating)):
         return {'real': float(obj.real), 'imag': float(obj.imag)}
     elif isinstance(obj, np.ndarray):
-        return [convert_to_serializable(x) for x in obj]
-    elif isinstance(obj, list):
-        return [convert_to_serializable(x) for x in obj]
+        # Bulk conversion with tolist() instead of visiting every element in Python
+        if not np.iscomplexobj(obj):
+            return obj.tolist()
+        if obj.ndim == 0:
+            return convert_to_serializable(obj.item())
+        # Split into real and imaginary parts with one tolist() each, then pair them up
+        # as {real, imag} objects, which is the format the frontend reads
+        return _pair_complex(obj.real.tolist(), obj.imag.tolist(), obj.ndim)
     elif isinstance(obj, np.number):
         return float(obj)
     return obj
 
 
+def _json_default(obj):
+    """Fallback for objects the JSON encoder cannot handle natively (numpy arrays, complex numbers)."""
+    if isinstance(obj, (np.ndarray, np.number, complex)):
+        return convert_to_serializable(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
-# SIM
-def run_simulation_thread(sim_params):
+
+def dumps_json(obj):
     """
-    Main simulation function that runs in a separate thread.
+    Serialize an object to JSON bytes.
     
-    This function handles the complete power system simulation process:
-    1. Model loading and initialization
-    2. Power flow analysis
-    3. Dynamic simulation with events and control actions
-    4. Post-simulation analysis (eigenvalues, power flows, etc.)
+    Uses orjson when available, which encodes real-valued numpy arrays natively.
+    Complex arrays and other numpy objects go through convert_to_serializable.
     
     Args:
-        sim_params: Dictionary containing all simulation parameters
+        obj: The object to serialize
+    
+    Returns:
+        UTF-8 encoded JSON as bytes
     """
-    global simulation_state
-    try:
-        simulation_state['running'] = True
-        print("\nSimulation parameters:", json.dumps(sim_params, indent=2))
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default).encode()
+
+
+class UpdateBroker:
+    """
+    Fans simulation updates out to every connected SSE client.
+    
+    Updates are passed around as {'type': update type, 'frame': encoded SSE
+    frame}, so each update is encoded once however many clients receive it.
+    
+    Each client gets its own bounded Subscription, so clients no longer take
+    updates away from each other. The updates of the current run are also kept in a
+    bounded backlog that is replayed to clients that connect later, the
+    frontend only opens its stream once the start request has returned.
+    
+    Queues and backlog never block the simulation thread. When one is full
+    the oldest queued step update makes room for the new update, so a slow
+    client skips ahead to the latest state. Other updates (init, complete,
+    error) must reach the client and are only replaced when there is no step
+    update left to drop.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._backlog = deque()
+
+    def reset(self):
+        """Forget the backlog of the previous run, called before a new run starts."""
+        with self._lock:
+            self._backlog.clear()
+
+    def subscribe(self):
+        """
+        Register a client.
         
-        # Start timing the simulation
-        start_time = time.time()
+        Returns:
+            The client's Subscription, already holding the backlog of the current run
+        """
+        subscriber = Subscription(self.maxsize)
+        with self._lock:
+            for update in self._backlog:
+                subscriber.offer(update)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a client's Subscription, called when its stream ends."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, update):
+        """
+        Send an update to every client and add it to the backlog.
         
-        # model loading and initialization
+        Args:
+            update: Dictionary with the update 'type' and its encoded SSE 'frame'
         
-        print("\n=== Loading model ===")
-        network_name = sim_params.get('network', 'k2a')
-        try:
-            model_module = importlib.import_module(f"tops.ps_models.{network_name}")
-        except ModuleNotFoundError:
-            update_queue.put({
-                'type': 'error',
-                'data': f'Network {network_name} not found'
-            })
-            simulation_state['running'] = False
-            return
+        Returns:
+            True if the update was added to the backlog, False if it was dropped
+        """
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.offer(update)
+            if len(self._backlog) >= self.maxsize and not self._make_room(self._backlog, update):
+                return False
+            self._backlog.append(update)
+        return True
 
-        importlib.reload(model_module)
-        model = model_module.load()
-        print(f"Model {network_name} loaded successfully")
+    @staticmethod
+    def _make_room(pending, update):
+        """
+        Remove one update from a full deque of queued updates.
         
-        # Restructure model components for TOPS compatibility
-        # Ensure loads are wrapped as DynamicLoad if provided as a flat list
-        if isinstance(model.get('loads'), list):
-            model['loads'] = {'DynamicLoad': model['loads']}
-
-        # Convert transformer data to dynamic transformer format if necessary
-        if 'transformers' in model:
-            trafos = model['transformers']
-            header = list(trafos[0])
-            rows = [list(r) for r in trafos[1:]]
-
-            if 'ratio_from' not in header:
-                header.append('ratio_from')
-                rows = [r + [1] for r in rows]
-            if 'ratio_to' not in header:
-                header.append('ratio_to')
-                rows = [r + [1] for r in rows]
-
-            model['trafos'] = {'DynTrafo': [header] + rows}
-            model.pop('transformers')
-
-        print("Model structure prepared")
-
-        # Create power system model, using k2a model
-        ps = dps.PowerSystemModel(model=model)
-        print("PowerSystemModel instance created")
-
-        # POWER FLOW ANALYSIS
+        Args:
+            pending: Deque of queued updates, oldest first
+            update: The update that needs room
         
-        try:
-            print("Running power flow...")
-            ps.power_flow()
-            print("Power flow completed successfully")
-        except Exception as e:
-            print("Error in power flow:")
-            import traceback
-            traceback.print_exc()
-            raise
+        Returns:
+            True if an update was removed, False if the new update should be dropped
+        """
+        for i, queued in enumerate(pending):
+            if queued['type'] == 'step':
+                del pending[i]
+                return True
+        if update['type'] == 'step':
+            return False
+        pending.popleft()
+        return True
+
+
+class Subscription:
+    """
+    Bounded ring of the updates waiting to be sent to one SSE client.
+    
+    The simulation thread appends to it and the client's stream takes
+    everything that is pending at once, so updates that arrive while the
+    client is busy are sent together in one write.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._pending = deque()
+        self._ready = threading.Condition(threading.Lock())
+
+    def offer(self, update):
+        """Add an update, making room as UpdateBroker._make_room decides when full."""
+        with self._ready:
+            if len(self._pending) < self.maxsize or UpdateBroker._make_room(self._pending, update):
+                self._pending.append(update)
+                self._ready.notify()
+
+    def take(self, timeout):
+        """
+        Wait for updates and take all pending ones.
         
-        # DYNAMIC SIMULATION INITIALIZATION
+        Args:
+            timeout: Seconds to wait when nothing is pending
         
-        try:
-            print("Initializing dynamic simulation...")
-            ps.init_dyn_sim()
-            print("Dynamic simulation initialized successfully")
-            print("Initial state vector size:", len(ps.x_0))
-        except Exception as e:
-            print("Error in dynamic simulation initialization:")
-            import traceback
-            traceback.print_exc()
-            raise
+        Returns:
+            List of updates, oldest first, empty if the wait timed out
+        """
+        with self._ready:
+            if not self._pending:
+                self._ready.wait(timeout)
+            updates = list(self._pending)
+            self._pending.clear()
+        return updates
 
-        # MODEL STATE VERIFICATION
-        
-        print("\nVerifying model state...")
-        try:
-            max_residual = max(abs(ps.ode_fun(0, ps.x_0)))
-            print(f"Maximum residual after initialization: {max_residual}")
-            if max_residual > 1e-6:
-                print("Warning: High residual in model initialization")
-        except Exception as e:
-            print("Error checking model state:")
-            import traceback
-            traceback.print_exc()
-            raise
 
-        # SETUP STATE DERIVATIVE FUNCTION
-        
+update_broker = UpdateBroker(UPDATE_QUEUE_SIZE)
+
+
+def sse_frame(update):
+    """
+    Encode an update as one Server-Sent Events frame.
+    
+    Args:
+        update: Dictionary with 'type' and 'data' keys, encodable with dumps_json
+    
+    Returns:
+        The frame as bytes, ready to be written to the stream
+    """
+    return b"data: " + dumps_json(update) + b"\n\n"
+
+
+# Error frame sent when a stream fails. The exception itself is only logged, its
+# message can contain server internals that clients should not see.
+SSE_ERROR_FRAME = sse_frame({'type': 'error', 'data': 'Error in simulation update stream'})
+
+
+def publish_update(update):
+    """
+    Publish an update to the connected clients without blocking the simulation thread.
+    
+    The update is encoded to an SSE frame here, once for all clients and while
+    the arrays it references still hold this step's values. Its data must be
+    encodable with dumps_json: a dictionary of results, or the message string
+    of an error.
+    
+    Args:
+        update: Dictionary with 'type' and 'data' keys
+    
+    Returns:
+        True if the update was queued, False if it was dropped
+    """
+    return update_broker.publish({'type': update['type'], 'frame': sse_frame(update)})
+
+
+def gzip_stream(chunks, level=SSE_GZIP_LEVEL):
+    """
+    Gzip-compress a stream of byte chunks.
+    
+    Every chunk is flushed with Z_SYNC_FLUSH, so the client can decompress
+    and handle each event as soon as it arrives.
+    
+    Args:
+        chunks: Generator yielding bytes
+        level: zlib compression level
+    
+    Yields:
+        Gzip-encoded bytes
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    finally:
+        # Close the wrapped generator right away when the client disconnects
+        chunks.close()
+
+
+def to_live_frame(step):
+    """
+    Reduce a step update for the live stream.
+    
+    Quantities in LIVE_FRAME_EXCLUDE are left out, the full state vector is
+    the largest array in a step and no live view shows it.
+    
+    The live plots do not need double precision. orjson writes float32 values
+    with their shortest representation, which makes step messages about a
+    third smaller. The stdlib encoder would write them with all double
+    precision digits, so without orjson the step is sent unchanged. Complex
+    arrays keep double precision since they are encoded element by element.
+    
+    Args:
+        step: Dictionary of step quantities
+    
+    Returns:
+        Dictionary without the excluded quantities, float64 arrays converted to float32
+    """
+    if orjson is None:
+        return {key: value for key, value in step.items() if key not in LIVE_FRAME_EXCLUDE}
+    return {
+        key: value.astype(np.float32) if isinstance(value, np.ndarray) and value.dtype == np.float64 else value
+        for key, value in step.items()
+        if key not in LIVE_FRAME_EXCLUDE
+    }
+
+
+# Initialized power systems, {network_name: (module mtime, PowerSystemModel)}
+_ps_cache = {}
+_ps_cache_lock = threading.Lock()
+
+
+def build_power_system(model):
+    """
+    Create a PowerSystemModel from a network model and initialize it.
+    
+    Runs the power flow and the dynamic simulation initialization.
+    
+    Args:
+        model: Model dictionary as returned by load_network_model
+    
+    Returns:
+        Initialized PowerSystemModel instance
+    """
+    # Restructure model components for TOPS compatibility
+    # Ensure loads are wrapped as DynamicLoad if provided as a flat list
+    if isinstance(model.get('loads'), list):
+        model['loads'] = {'DynamicLoad': model['loads']}
+
+    # Convert transformer data to dynamic transformer format if necessary
+    if 'transformers' in model:
+        trafos = model['transformers']
+        header = list(trafos[0])
+        rows = [list(r) for r in trafos[1:]]
+
+        if 'ratio_from' not in header:
+            header.append('ratio_from')
+            rows = [r + [1] for r in rows]
+        if 'ratio_to' not in header:
+            header.append('ratio_to')
+            rows = [r + [1] for r in rows]
+
+        model['trafos'] = {'DynTrafo': [header] + rows}
+        model.pop('transformers')
+
+    logger.debug("Model structure prepared")
+
+    # Create power system model, using k2a model
+    ps = dps.PowerSystemModel(model=model)
+    logger.debug("PowerSystemModel instance created")
+
+    # POWER FLOW ANALYSIS
+
+    try:
+        logger.info("Running power flow...")
+        ps.power_flow()
+        logger.info("Power flow completed successfully")
+        # Sparse copy of the load flow admittance matrix for the bus power calculation
+        ps._y_bus_lf_csr = scipy.sparse.csr_matrix(ps.y_bus_lf)
+    except Exception:
+        logger.exception("Error in power flow")
+        raise
+
+    # DYNAMIC SIMULATION INITIALIZATION
+
+    try:
+        logger.info("Initializing dynamic simulation...")
+        ps.init_dyn_sim()
+        logger.info("Dynamic simulation initialized successfully")
+    except Exception:
+        logger.exception("Error in dynamic simulation initialization")
+        raise
+
+    return ps
+
+
+def get_power_system(network_name, model):
+    """
+    Get an initialized PowerSystemModel for a network.
+    
+    Power flow and initialization only depend on the network, so the
+    initialized system is cached and every run gets its own deep copy.
+    Events modify the admittance matrices and model inputs in place, so
+    the cached instance itself is never simulated.
+    
+    Args:
+        network_name: Name of the network, already loaded with load_network_model
+        model: Model dictionary used when the system has to be (re)built
+    
+    Returns:
+        Initialized PowerSystemModel instance owned by the caller
+    """
+    with _model_cache_lock:
+        mtime = _model_cache[network_name][0]
+    with _ps_cache_lock:
+        cached = _ps_cache.get(network_name)
+        if cached is not None and cached[0] == mtime:
+            try:
+                logger.info("Reusing initialized power system for %s", network_name)
+                return copy.deepcopy(cached[1])
+            except Exception:
+                logger.warning("Copying cached power system failed, rebuilding", exc_info=True)
+        ps = build_power_system(model)
+        _ps_cache[network_name] = (mtime, copy.deepcopy(ps))
+        return ps
+
+
+def make_algebraic_solver(ps):
+    """
+    Solver for the network equations with the same signature as ps.solve_algebraic.
+    
+    ps.solve_algebraic builds several scipy sparse matrices and runs a sparse solve
+    on every call, which is most of the simulation time for small networks. Here the
+    constant part (y_bus_red + y_bus_red_mod) is kept as a dense matrix that is only
+    rebuilt when a line event replaces y_bus_red or a fault changes y_bus_red_mod,
+    the variable admittances are added in place and the system is solved densely.
+    
+    Args:
+        ps: Initialized PowerSystemModel
+    
+    Returns:
+        Function (t, x) -> bus voltages of the reduced system
+    """
+    if ps.n_bus_red > ALGEBRAIC_DENSE_MAX_BUSES:
+        return ps.solve_algebraic
+
+    injection_models = ps.mdl_instructions['current_injections']
+    var_adm_models = ps.mdl_instructions['dyn_var_adm']
+    cached_y_red = None
+    cached_y_mod_data = None
+    y_const = None
+
+    def solve_algebraic(t, x):
+        nonlocal cached_y_red, cached_y_mod_data, y_const
+        y_mod = ps.y_bus_red_mod
+        y_mod_data = y_mod.data if scipy.sparse.issparse(y_mod) else np.asarray(y_mod)
+        if (y_const is None or ps.y_bus_red is not cached_y_red
+                or not np.array_equal(y_mod_data, cached_y_mod_data)):
+            y_const = np.asarray((ps.y_bus_red + y_mod).todense(), dtype=complex)
+            cached_y_red = ps.y_bus_red
+            cached_y_mod_data = y_mod_data.copy()
+
+        i_inj = np.zeros(ps.n_bus_red, dtype=complex)
+        for mdl in injection_models:
+            bus_idx_red, i_inj_mdl = mdl.current_injections(x, None)
+            np.add.at(i_inj, bus_idx_red, i_inj_mdl)
+
+        y = y_const.copy()
+        for mdl in var_adm_models:
+            data, (row_idx, col_idx) = mdl.dyn_var_adm(x, None)
+            np.add.at(y, (np.ravel(row_idx), np.ravel(col_idx)), np.ravel(data))
+
+        return np.linalg.solve(y, i_inj)
+
+    return solve_algebraic
+
+
+def eigenvalue_decomposition(ps_lin):
+    """
+    Eigenvalue decomposition of a linearized power system model.
+    
+    Replaces ps_lin.eigenvalue_decomposition(), which also inverts the right
+    eigenvectors to get the left ones. Only eigenvalues, right eigenvectors,
+    damping and frequency are computed, which is all get_mode_idx() and the
+    mode shapes need. The A-matrix is overwritten in the process.
+    
+    Args:
+        ps_lin: Linearized PowerSystemModelLinearization instance
+    """
+    ps_lin.eigs, ps_lin.rev = scipy.linalg.eig(
+        ps_lin.a, left=False, right=True, overwrite_a=True, check_finite=False)
+    ps_lin.damping = np.divide(
+        -ps_lin.eigs.real, np.abs(ps_lin.eigs),
+        out=np.full_like(ps_lin.eigs.real, np.nan),
+        where=ps_lin.eigs.real != 0,
+    )
+    ps_lin.freq = ps_lin.eigs.imag / (2 * np.pi)
+
+
+# SIM
+def run_simulation(sim_params, event_params, model, publish=None):
+    """
+    Run a complete power system simulation.
+    
+    This function handles the complete power system simulation process:
+    1. Model loading and initialization
+    2. Power flow analysis
+    3. Dynamic simulation with events and control actions
+    4. Post-simulation analysis (eigenvalues, power flows, etc.)
+    
+    Args:
+        sim_params: Dictionary with the network name and t_end
+        event_params: Dictionary with the step1, step2, lineOutage, shortCircuit
+            and tapChanger event parameters, in the format of sim_parameters
+        model: Model dictionary of the network, from load_network_model
+        publish: Optional callback that receives the init and step updates
+    
+    Returns:
+        Dictionary with the JSON-serializable results
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Simulation parameters: %s", json.dumps(sim_params, indent=2))
+    
+    # Start timing the simulation
+    start_time = time.time()
+    
+    # model initialization
+    
+    network_name = sim_params.get('network', 'k2a')
+    logger.info("Model %s loaded successfully", network_name)
+
+    # Power system model with power flow and dynamic initialization done,
+    # reused from the previous run on the same network when possible
+    ps = get_power_system(network_name, model)
+    logger.debug("Initial state vector size: %d", len(ps.x_0))
+
+    # MODEL STATE VERIFICATION
+    
+    logger.debug("Verifying model state...")
+    try:
+        max_residual = float(np.abs(ps.ode_fun(0, ps.x_0)).max())
+        logger.debug("Maximum residual after initialization: %s", max_residual)
+        if max_residual > 1e-6:
+            logger.warning("High residual in model initialization: %s", max_residual)
+    except Exception:
+        logger.exception("Error checking model state")
+        raise
+
+    # SETUP STATE DERIVATIVE FUNCTION
+    
+    # Resolve short circuit parameters once, the derivative function is evaluated several times per step
+    sc_params = event_params['shortCircuit']
+    sc_bus_id = sc_params['busId']
+    if sc_bus_id is not None and sc_bus_id != '':
+        sc_diag_idx = (int(sc_bus_id),) * 2
+        sc_start = sc_params['startTime']
+        sc_end = sc_start + sc_params['duration']
+        sc_admittance = sc_params['admittance']
+        sc_active = False
+
+        # y_bus_red_mod is a sparse matrix with every diagonal entry stored, so the fault
+        # admittance can be written straight into its data array instead of going through
+        # the sparse indexing machinery. Falls back to item assignment for other formats.
+        y_mod = ps.y_bus_red_mod
+        sc_slot = None
+        if scipy.sparse.issparse(y_mod) and y_mod.format == 'csr':
+            row_start, row_end = y_mod.indptr[sc_diag_idx[0]], y_mod.indptr[sc_diag_idx[0] + 1]
+            match = np.flatnonzero(y_mod.indices[row_start:row_end] == sc_diag_idx[1])
+            if match.size:
+                sc_slot = row_start + match[0]
+
         # Create a wrapper for state derivatives that handles short circuit
         def state_derivatives_with_sc(t, x, v):
             """Custom state derivative function with short circuit handling"""
-            # Apply short circuit if configured
-            if sim_parameters['shortCircuit']['busId'] is not None and sim_parameters['shortCircuit']['busId'] != '':
-                sc_time = sim_parameters['shortCircuit']['startTime']
-                sc_duration = sim_parameters['shortCircuit']['duration']
-                sc_bus_id = sim_parameters['shortCircuit']['busId']
-                # Convert busId from string to integer if needed
-                sc_bus_idx = int(sc_bus_id) if isinstance(sc_bus_id, str) and sc_bus_id != '' else sc_bus_id
-                sc_admittance = sim_parameters['shortCircuit']['admittance']
-                
-                # Apply fault during the specified time window
-                if sc_time <= t <= (sc_time + sc_duration):
-                    ps.y_bus_red_mod[(sc_bus_idx,) * 2] = sc_admittance
+            nonlocal sc_active
+            # Only write to the admittance matrix when the fault is applied or cleared
+            active = sc_start <= t <= sc_end
+            if active != sc_active:
+                if sc_slot is not None:
+                    y_mod.data[sc_slot] = sc_admittance if active else 0
                 else:
-                    ps.y_bus_red_mod[(sc_bus_idx,) * 2] = 0
-            
+                    ps.y_bus_red_mod[sc_diag_idx] = sc_admittance if active else 0
+                sc_active = active
+
             # Get the state derivatives from the power system model
             return ps.state_derivatives(t, x, v)
-        
-        # SETUP SOLVER
-        
-        # Initialize the solver
-        print("\nSetting up simulation...")
-        sol = dps_sol.ModifiedEulerDAE(
-            state_derivatives_with_sc, 
-            ps.solve_algebraic, 
-            0, 
-            ps.x_0.copy(), 
-            t_end=sim_params.get('t_end', 20), 
-            max_step=5e-3
-        )
-
-        # Initialize results storage
-        results = defaultdict(list)
-        
-        # Initialize tracking sets for line status
-        disconnected_lines = set()
-        reconnected_lines = set()
-        
-        # Send initial data to frontend
-        update_queue.put({
+    else:
+        # No short circuit configured, let the solver call the model directly
+        state_derivatives_with_sc = ps.state_derivatives
+    
+    # SETUP SOLVER
+    
+    # Initialize the solver
+    logger.debug("Setting up simulation...")
+    sol = dps_sol.ModifiedEulerDAE(
+        state_derivatives_with_sc, 
+        make_algebraic_solver(ps), 
+        0, 
+        ps.x_0.copy(), 
+        t_end=sim_params.get('t_end', 20), 
+        max_step=5e-3
+    )
+
+    # Initialize results storage, one preallocated row per time step.
+    # Buffers are created from the first step since their shapes depend on the model.
+    results = {}
+    n_rows = int(np.ceil(sol.t_end / sol.dt)) + 2
+    n_steps = 0
+    last_publish = float('-inf')
+    
+    # EVENT SCHEDULE
+    
+    # All events (load steps, line outages/reconnections, tap changes) go into one list of
+    # (time, order, handler, args) sorted by time, so each step only compares sol.t with
+    # the next due event. Handlers apply the event to the power system model.
+    events = []
+    
+    # Model handles used inside the time loop
+    gen = ps.gen['GEN']
+    dload = ps.loads['DynamicLoad']
+    trafo = ps.trafos['DynTrafo']
+    
+    # Quantities that only depend on the states and bus voltages. Works on a single step
+    # or on the stored series (one row per step) alike.
+    speed_idx = gen.state_idx_global['speed']
+    
+    def state_quantities(x, v):
+        """Bus voltage magnitude/angle and generator speed for the given states and voltages"""
+        return {'v_magnitude': np.abs(v), 'v_angle': np.angle(v), 'gen_speed': x[..., speed_idx]}
+    
+    # Load step changes as (time, load index, g_setp, b_setp)
+    load_bus_idx = dload.bus_idx_red['terminal']
+    load_steps = [
+        (step['time'], step['load_index'], step['g_setp'], step['b_setp'])
+        for step in (event_params['step1'], event_params['step2'])
+    ]
+    
+    def apply_load_steps():
+        """Apply all load steps reached so far, in order, so the later entry wins on the same load"""
+        for step_time, load_index, g_setp, b_setp in load_steps:
+            if step_time <= sol.t:
+                # A setpoint of 0 keeps the current value
+                if g_setp != 0:
+                    dload.set_input('g_setp', g_setp, load_index)
+                if b_setp != 0:
+                    dload.set_input('b_setp', b_setp, load_index)
+    
+    for step in load_steps:
+        events.append((step[0], len(events), apply_load_steps, ()))
+    
+    # Initialize tracking sets for line status
+    disconnected_lines = set()
+    reconnected_lines = set()
+    
+    def apply_line_event(action, lineId):
+        """Disconnect or reconnect a line, a reconnection only follows a successful outage"""
+        if action == 'disconnect' and lineId not in disconnected_lines:
+            try:
+                ps.lines['Line'].event(ps, lineId, 'disconnect')
+                disconnected_lines.add(lineId)  # Mark as disconnected
+                logger.info("Line %s disconnected at t=%s", lineId, sol.t)
+            except Exception as e:
+                logger.error("Error disconnecting line %s: %s", lineId, e)
+        elif (action == 'reconnect' and lineId in disconnected_lines and
+              lineId not in reconnected_lines):
+            try:
+                ps.lines['Line'].event(ps, lineId, 'reconnect')
+                reconnected_lines.add(lineId)  # Mark as reconnected
+                logger.info("Line %s reconnected at t=%s", lineId, sol.t)
+            except Exception as e:
+                logger.error("Error reconnecting line %s: %s", lineId, e)
+    
+    # A reconnection can only follow its outage, so it is never scheduled before it
+    if event_params['lineOutage'].get('enabled', True):
+        for outage in event_params['lineOutage']['outages']:
+            lineId = outage.get('lineId')
+            if not lineId:
+                continue
+            outageTime = outage.get('time')
+            events.append((outageTime, len(events), apply_line_event, ('disconnect', lineId)))
+            reconnect = outage.get('reconnect', {})
+            if reconnect.get('enabled', False):
+                reconnectTime = max(reconnect.get('time', 0), outageTime)
+                events.append((reconnectTime, len(events), apply_line_event, ('reconnect', lineId)))
+    
+    # Transformer tap changes as (start, end, transformer index, ratio), each one
+    # holds its ratio for 9 s
+    tap_changes = []
+    if event_params['tapChanger']['enabled']:
+        tap_changes = [
+            (change['time'], change['time'] + 9, int(change['transformerId']), change['ratioChange'])
+            for change in event_params['tapChanger']['changes']
+        ]
+    
+    def apply_tap_changes():
+        """Apply the active tap changes in configured order, the last one wins"""
+        for t_on, t_off, trafo_idx, ratio in tap_changes:
+            if t_on <= sol.t < t_off:
+                trafo.set_input('ratio_from', ratio, trafo_idx)
+    
+    # The active changes only differ when a window opens or closes
+    for t_boundary in sorted({t for change in tap_changes for t in change[:2]}):
+        events.append((t_boundary, len(events), apply_tap_changes, ()))
+    
+    events.sort(key=lambda event: event[:2])
+    event_ptr = 0
+    
+    # Send initial data to frontend
+    if publish is not None:
+        publish({
             'type': 'init',
             'data': {
                 't_end': sol.t_end,
@@ -296,318 +885,489 @@ def run_simulation_thread(sim_params):
             }
         })
 
-        # ---------------------------------------------------------------
-        # MAIN SIMULATION LOOP
-        # ---------------------------------------------------------------
+    # ---------------------------------------------------------------
+    # MAIN SIMULATION LOOP
+    # ---------------------------------------------------------------
+    
+    while sol.t <= sol.t_end:
+        # --- APPLY EVENTS ---
         
-        while sol.t <= sol.t_end:
-            # --- APPLY LOAD CHANGES ---
-            
-            # Step 1 load changes
-            if sim_parameters['step1']['time'] <= sol.t:
-                g_setp = sim_parameters['step1']['g_setp']
-                ps.loads['DynamicLoad'].set_input('g_setp', 
-                    g_setp if g_setp != 0 else ps.loads['DynamicLoad']._input_values['g_setp'][sim_parameters['step1']['load_index']], 
-                    sim_parameters['step1']['load_index'])
-                b_setp = sim_parameters['step1']['b_setp']
-                ps.loads['DynamicLoad'].set_input('b_setp', 
-                    b_setp if b_setp != 0 else ps.loads['DynamicLoad']._input_values['b_setp'][sim_parameters['step1']['load_index']], 
-                    sim_parameters['step1']['load_index'])
-
-            # Step 2 load changes
-            if sim_parameters['step2']['time'] <= sol.t:
-                g_setp = sim_parameters['step2']['g_setp']
-                ps.loads['DynamicLoad'].set_input('g_setp', 
-                    g_setp if g_setp != 0 else ps.loads['DynamicLoad']._input_values['g_setp'][sim_parameters['step2']['load_index']], 
-                    sim_parameters['step2']['load_index'])
-                b_setp = sim_parameters['step2']['b_setp']
-                ps.loads['DynamicLoad'].set_input('b_setp', 
-                    b_setp if b_setp != 0 else ps.loads['DynamicLoad']._input_values['b_setp'][sim_parameters['step2']['load_index']], 
-                    sim_parameters['step2']['load_index'])
-
-            # --- HANDLE LINE OUTAGES & RECONNECTIONS ---
-            
-            if sim_parameters['lineOutage'].get('enabled', True):
-                for outage in sim_parameters['lineOutage']['outages']:
-                    lineId = outage.get('lineId')
-                    outageTime = outage.get('time')
-                    reconnect = outage.get('reconnect', {})
-                    reconnectEnabled = reconnect.get('enabled', False)
-                    reconnectTime = reconnect.get('time', 0)
-                    
-                    # Check if this line needs to be disconnected
-                    if (lineId and lineId != '' and 
-                        lineId not in disconnected_lines and 
-                        sol.t >= outageTime):
-                        try:
-                            ps.lines['Line'].event(ps, lineId, 'disconnect')
-                            disconnected_lines.add(lineId)  # Mark as disconnected
-                            print(f"Line {lineId} disconnected at t={sol.t}")
-                        except Exception as e:
-                            print(f"Error disconnecting line {lineId}: {e}")
-                    
-                    # Check if this line needs to be reconnected
-                    if (reconnectEnabled and lineId and lineId != '' and 
-                        lineId in disconnected_lines and 
-                        lineId not in reconnected_lines and 
-                        sol.t >= reconnectTime):
-                        try:
-                            ps.lines['Line'].event(ps, lineId, 'reconnect')
-                            reconnected_lines.add(lineId)  # Mark as reconnected
-                            print(f"Line {lineId} reconnected at t={sol.t}")
-                        except Exception as e:
-                            print(f"Error reconnecting line {lineId}: {e}")
-
-            # --- APPLY TRANSFORMER TAP CHANGES ---
-            
-            if sim_parameters['tapChanger']['enabled']:
-                for change in sim_parameters['tapChanger']['changes']:
-                    if change['time'] <= sol.t < (change['time'] + 9):
-                        trafo_idx = int(change['transformerId'])
-                        ps.trafos['DynTrafo'].set_input('ratio_from', change['ratioChange'], trafo_idx)
+        # Load changes, line outages & reconnections and transformer tap changes that are due
+        while event_ptr < len(events) and sol.t >= events[event_ptr][0]:
+            _, _, handler, args = events[event_ptr]
+            event_ptr += 1
+            handler(*args)
 
-            # --- COLLECT RESULTS FOR THIS TIME STEP ---
-            
-            step_data = {
-                't': float(sol.t),
-                'x': convert_to_serializable(sol.x.copy()),
-                'v': convert_to_serializable(sol.v.copy()),
-                'v_magnitude': convert_to_serializable(np.abs(sol.v)),
-                'v_angle': convert_to_serializable(np.angle(sol.v)),
-                'gen_speed': convert_to_serializable(ps.gen['GEN'].speed(sol.x, sol.v)),
-                'gen_I': convert_to_serializable(ps.gen['GEN'].i(sol.x, sol.v)),
-                'load_I': convert_to_serializable(ps.loads['DynamicLoad'].i(sol.x, sol.v)),
-                'load_P': convert_to_serializable(ps.loads['DynamicLoad'].p(sol.x, sol.v)),
-                'load_Q': convert_to_serializable(ps.loads['DynamicLoad'].q(sol.x, sol.v)),
-                'trafo_current_from': convert_to_serializable(ps.trafos['DynTrafo'].i_from(sol.x, sol.v)),
-                'trafo_current_to': convert_to_serializable(ps.trafos['DynTrafo'].i_to(sol.x, sol.v))
-            }
+        # --- COLLECT RESULTS FOR THIS TIME STEP ---
+        
+        # sol.x/sol.v are updated in place by the solver, they are copied when written into
+        # the result buffers below. Quantities that only depend on x and v are computed for
+        # the whole series after the loop, the ones here also depend on model inputs that
+        # events change during the run.
+        # Load current and power from a single evaluation of the load admittance,
+        # DynamicLoad.p() and .q() would each recompute s() and i()
+        load_I = dload.i(sol.x, sol.v)
+        load_S = sol.v[load_bus_idx] * np.conj(load_I)
+        step_data = {
+            't': float(sol.t),
+            'x': sol.x,
+            'v': sol.v,
+            'gen_I': gen.i(sol.x, sol.v),
+            'load_I': load_I,
+            'load_P': load_S.real,
+            'load_Q': load_S.imag,
+            'trafo_current_from': trafo.i_from(sol.x, sol.v),
+            'trafo_current_to': trafo.i_to(sol.x, sol.v)
+        }
+
+        # Store in results for final return
+        if not results:
+            for key, value in step_data.items():
+                value = np.asarray(value)
+                results[key] = np.empty((n_rows,) + value.shape, dtype=value.dtype)
+        elif n_steps == n_rows:
+            n_rows *= 2
+            for key, buf in results.items():
+                results[key] = np.resize(buf, (n_rows,) + buf.shape[1:])
+        for key, value in step_data.items():
+            results[key][n_steps] = value
 
-            # Send real-time data to frontend
-            update_queue.put({
+        # Send real-time data to frontend, decimated to the publish rate and in single precision.
+        # The update references this step's buffer rows, which are never overwritten.
+        # The complete message carries every step in full precision.
+        now = time.monotonic()
+        if publish is not None and now - last_publish >= STEP_PUBLISH_INTERVAL:
+            step_row = {key: buf[n_steps] for key, buf in results.items()}
+            step_row.update(state_quantities(step_row['x'], step_row['v']))
+            publish({
                 'type': 'step',
-                'data': step_data
+                'data': to_live_frame(step_row)
             })
-            
-            # Store in results for final return
-            for key, value in step_data.items():
-                results[key].append(value)
+            last_publish = now
+        n_steps += 1
 
-            # Advance to next time step
-            sol.step()
+        # Advance to next time step
+        sol.step()
 
-        # ---------------------------------------------------------------
-        # POST-SIMULATION ANALYSIS
-        # ---------------------------------------------------------------
-        
-        print("\nPreparing final results...")
-        # Convert all results to serializable format
-        serializable_results = {k: convert_to_serializable(v) for k, v in results.items()}
-        
-        # --- POWER FLOW ANALYSIS ---
+    # ---------------------------------------------------------------
+    # POST-SIMULATION ANALYSIS
+    # ---------------------------------------------------------------
+    
+    logger.debug("Preparing final results...")
+    series = {key: buf[:n_steps] for key, buf in results.items()}
+    # Evaluate the state-only quantities over the whole series at once. The merge keeps the
+    # original key order (t, x, v, state quantities, model outputs).
+    series = {**{key: series[key] for key in ('t', 'x', 'v')},
+              **state_quantities(series['x'], series['v']),
+              **series}
+    # Convert all results to serializable format. orjson encodes real-valued arrays
+    # natively, about twice as fast as going through nested lists, so with orjson
+    # only the complex ones are converted here.
+    serializable_results = {
+        k: v if orjson is not None and not np.iscomplexobj(v) else convert_to_serializable(v)
+        for k, v in series.items()
+    }
+    
+    # --- POWER FLOW ANALYSIS ---
+    
+    # Calculate line power flows
+    lines_power = {}
+    try:
+        # The line model returns the flows of all lines at once, evaluate each quantity once
+        line_model = ps.lines['Line']
+        p_from = np.real(line_model.p_from(sol.x, sol.v)).tolist()
+        q_from = np.real(line_model.q_from(sol.x, sol.v)).tolist()
+        p_to = np.real(line_model.p_to(sol.x, sol.v)).tolist()
+        q_to = np.real(line_model.q_to(sol.x, sol.v)).tolist()
+        if hasattr(line_model, 'par') and 'name' in line_model.par.dtype.names:
+            line_ids = [str(name) for name in line_model.par['name']]
+        else:
+            line_ids = [f"L{i+1}" for i in range(len(p_from))]
+        for i, line_id in enumerate(line_ids):
+            lines_power[line_id] = {
+                'p_from': p_from[i],
+                'q_from': q_from[i],
+                'p_to': p_to[i],
+                'q_to': q_to[i]
+            }
+    except Exception as e:
+        logger.error("Error extracting line power flow: %s", e)
+    serializable_results['lines'] = lines_power
+
+    # --- EIGENVALUE ANALYSIS ---
+    
+    try:
+        logger.info("Starting eigenvalue analysis at final operating point...")
+        # Create linearized model around final operating point
+        ps_lin = dps_mdl.PowerSystemModelLinearization(ps)
+        ps_lin.linearize()
+        eigenvalue_decomposition(ps_lin)
+
+        # Get eigenvalues
+        eigs = ps_lin.eigs
+        logger.debug("Eigenvalues at final operating point: %s", eigs)
+
+        # Identify electromechanical modes
+        mode_idx = ps_lin.get_mode_idx(['em'], damp_threshold=0.3)
+        logger.debug("Electromechanical mode indices: %s", mode_idx)
         
-        # Calculate line power flows
-        lines_power = {}
-        try:
-            for i, line in enumerate(getattr(ps.lines['Line'], 'models', [ps.lines['Line']])):
-                line_id = line.name if hasattr(line, 'name') else f"L{i+1}"
-                lines_power[line_id] = {
-                    'p_from': float(np.real(line.p_from(sol.x, sol.v)[i])),
-                    'q_from': float(np.real(line.q_from(sol.x, sol.v)[i])),
-                    'p_to': float(np.real(line.p_to(sol.x, sol.v)[i])),
-                    'q_to': float(np.real(line.q_to(sol.x, sol.v)[i]))
-                }
-        except Exception as e:
-            print(f"Error extracting line power flow: {e}")
-        serializable_results['lines'] = lines_power
+        # Prepare eigenvalue data for frontend
+        eigs_arr = np.asarray(eigs, dtype=complex)
+        eigenvalue_data = {
+            'real': eigs_arr.real.tolist(),
+            'imag': eigs_arr.imag.tolist(),
+            'frequency': (np.abs(eigs_arr.imag) / (2*np.pi)).tolist(),
+            'damping': (-100 * eigs_arr.real / np.abs(eigs_arr)).tolist(),
+            'electromechanical_modes': mode_idx.tolist() if mode_idx is not None else []
+        }
 
-        # --- EIGENVALUE ANALYSIS ---
+        logger.debug("Eigenvalue data being sent to frontend: %s", eigenvalue_data)
+        logger.debug("Shape of arrays: real %d, imag %d, electromechanical_modes %d",
+                     len(eigenvalue_data['real']), len(eigenvalue_data['imag']),
+                     len(eigenvalue_data['electromechanical_modes']))
+
+        # --- CALCULATE MODE SHAPES ---
         
         try:
-            print("\nStarting eigenvalue analysis at final operating point...")
-            # Create linearized model around final operating point
-            ps_lin = dps_mdl.PowerSystemModelLinearization(ps)
-            ps_lin.linearize()
-            ps_lin.eigenvalue_decomposition()
-
-            # Get eigenvalues
-            eigs = ps_lin.eigs
-            print("\nEigenvalues at final operating point:", eigs)
-
-            # Identify electromechanical modes
-            mode_idx = ps_lin.get_mode_idx(['em'], damp_threshold=0.3)
-            print("\nElectromechanical mode indices:", mode_idx)
+            rev = ps_lin.rev  # Right eigenvectors
+            logger.debug("Calculating mode shapes...")
             
-            # Prepare eigenvalue data for frontend
-            eigenvalue_data = {
-                'real': [float(e.real) for e in eigs],
-                'imag': [float(e.imag) for e in eigs],
-                'frequency': [float(abs(e.imag/(2*np.pi))) for e in eigs],
-                'damping': [float(-100 * e.real/abs(e)) for e in eigs],
-                'electromechanical_modes': mode_idx.tolist() if mode_idx is not None else []
-            }
-
-            print("\nEigenvalue data being sent to frontend:", eigenvalue_data)
-            print("\nShape of arrays:")
-            print("real:", len(eigenvalue_data['real']))
-            print("imag:", len(eigenvalue_data['imag']))
-            print("electromechanical_modes:", len(eigenvalue_data['electromechanical_modes']))
-
-            # --- CALCULATE MODE SHAPES ---
+            # Get generator state indices
+            state_idx = ps.gen['GEN'].state_idx_global
+            logger.debug("Generator state indices: %s", state_idx)
             
-            try:
-                rev = ps_lin.rev  # Right eigenvectors
-                print("\nCalculating mode shapes...")
-                
-                # Get generator state indices
-                state_idx = ps.gen['GEN'].state_idx_global
-                print("Generator state indices:", state_idx)
-                
-                # Find speed state indices (typically second state of each generator)
-                speed_indices = []
-                for gen_states in state_idx:
-                    for i, state in enumerate(gen_states):
-                        if i == 1:  # Speed is typically the second state variable
-                            speed_indices.append(state)
-                
-                print("Speed state indices:", speed_indices)
+            # Second state of each generator, taken as one column of the index array. In the
+            # GEN model this is the rotor angle, its mode shapes only differ from the speed
+            # ones by one factor per mode, which the normalization below divides out.
+            if state_idx.dtype.names:
+                angle_indices = state_idx[state_idx.dtype.names[1]].tolist()
+            else:
+                angle_indices = np.asarray(state_idx)[:, 1].tolist()
+            
+            logger.debug("Angle state indices: %s", angle_indices)
+            
+            if angle_indices:
+                # Extract mode shapes for angle states at electromechanical modes
+                mode_shape = rev[np.ix_(angle_indices, mode_idx)]
+                logger.debug("Mode shape matrix shape: %s", mode_shape.shape)
+                logger.debug("Mode shape values: %s", mode_shape)
                 
-                if speed_indices:
-                    # Extract mode shapes for speed states at electromechanical modes
-                    mode_shape = rev[np.ix_(speed_indices, mode_idx)]
-                    print("\nMode shape matrix shape:", mode_shape.shape)
-                    print("Mode shape values:", mode_shape)
+                if mode_shape is not None:
+                    # Normalize mode shapes (TOPS standard approach)
+                    # Find generator with max magnitude for each mode
+                    max_idx = np.argmax(np.abs(mode_shape), axis=0)
+                    max_value = mode_shape[max_idx, np.arange(mode_shape.shape[1])]
                     
-                    if mode_shape is not None:
-                        # Normalize mode shapes (TOPS standard approach)
-                        for i in range(mode_shape.shape[1]):
-                            # Find generator with max magnitude for this mode
-                            max_idx = np.argmax(np.abs(mode_shape[:, i]))
-                            max_value = mode_shape[max_idx, i]
-                            
-                            if abs(max_value) > 0:
-                                # Rotate all vectors so max generator is at 0° angle
-                                # and scale relative to max magnitude
-                                mode_shape[:, i] = mode_shape[:, i] * np.exp(-1j * np.angle(max_value)) / np.abs(max_value)
-                        
-                        # Convert to magnitude and angle format for frontend
-                        magnitude = np.abs(mode_shape).tolist()
-                        angle = np.angle(mode_shape, deg=True).tolist()
-                        print("\nMode shape data being added:")
-                        print("Magnitude:", magnitude)
-                        print("Angle:", angle)
-                        
-                        # Add mode shapes to eigenvalue data
-                        eigenvalue_data.update({
-                            'mode_shapes': {
-                                'magnitude': magnitude,
-                                'angle': angle
-                            }
-                        })
-                else:
-                    print("\nWarning: No speed state indices found in generator model")
-            except Exception as e:
-                print("\nWarning: Could not compute mode shapes:", str(e))
-                print("Generator state indices:", getattr(ps.gen['GEN'], 'state_idx_global', None))
-                import traceback
-                traceback.print_exc()
-
-            # Print summary of modes for reference
-            print("\nMode Analysis Summary at final operating point:")
-            for i, eig in enumerate(eigs):
-                freq = abs(eig.imag/(2*np.pi))
-                damp = -100 * eig.real/abs(eig)
-                print(f"Mode {i+1}: λ = {eig:.3f}, freq = {freq:.2f} Hz, damping = {damp:.1f}%")
-                if i in mode_idx:
-                    print("  ^ Electromechanical mode")
-
-            # Store eigenvalue results
-            results['eigenvalues'] = eigenvalue_data
-            serializable_results['eigenvalues'] = eigenvalue_data
-            
+                    # Rotate all vectors so max generator is at 0° angle and scale relative
+                    # to max magnitude, a single complex division does both. All-zero modes
+                    # are left as is.
+                    mode_shape = mode_shape / np.where(max_value != 0, max_value, 1)
+                    
+                    # Convert to magnitude and angle format for frontend
+                    magnitude = np.abs(mode_shape).tolist()
+                    angle = np.angle(mode_shape, deg=True).tolist()
+                    logger.debug("Mode shape data being added: magnitude %s, angle %s", magnitude, angle)
+                    
+                    # Add mode shapes to eigenvalue data
+                    eigenvalue_data.update({
+                        'mode_shapes': {
+                            'magnitude': magnitude,
+                            'angle': angle
+                        }
+                    })
+            else:
+                logger.warning("No angle state indices found in generator model")
         except Exception as e:
-            print("\nError during eigenvalue analysis:", str(e))
-            import traceback
-            traceback.print_exc()
-            
-            # Send empty eigenvalue data if analysis fails
-            empty_eigenvalue_data = {
-                'real': [],
-                'imag': [],
-                'frequency': [],
-                'damping': [],
-                'electromechanical_modes': []
-            }
-            
-            results['eigenvalues'] = empty_eigenvalue_data
-            serializable_results['eigenvalues'] = empty_eigenvalue_data
+            logger.warning("Could not compute mode shapes: %s", e, exc_info=True)
+            logger.debug("Generator state indices: %s", getattr(ps.gen['GEN'], 'state_idx_global', None))
+
+        # Print summary of modes for reference, from the frequencies and dampings computed above
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Mode Analysis Summary at final operating point:")
+            em_modes = set(eigenvalue_data['electromechanical_modes'])
+            for i, (re, im, freq, damp) in enumerate(zip(
+                    eigenvalue_data['real'], eigenvalue_data['imag'],
+                    eigenvalue_data['frequency'], eigenvalue_data['damping'])):
+                logger.debug("Mode %d: λ = %.3f%+.3fj, freq = %.2f Hz, damping = %.1f%%%s",
+                             i+1, re, im, freq, damp, " (electromechanical)" if i in em_modes else "")
 
-        # --- BUS POWER FLOW CALCULATION ---
+        # Store eigenvalue results
+        results['eigenvalues'] = eigenvalue_data
+        serializable_results['eigenvalues'] = eigenvalue_data
         
-        # Compute bus power flow for each bus using S = V * conj(Ybus * V)
-        try:
-            v_final = sol.v.copy()
-            ybus = ps.y_bus_lf if hasattr(ps, 'y_bus_lf') else None
-            if ybus is not None:
-                s_bus = v_final * np.conj(ybus.dot(v_final))
-                bus_power = [
-                    {'p': float(np.real(s)), 'q': float(np.imag(s))}
-                    for s in s_bus
-                ]
-                serializable_results['bus_power'] = bus_power
-        except Exception as e:
-            print(f"Error computing bus power flow: {e}")
+    except Exception as e:
+        logger.exception("Error during eigenvalue analysis: %s", e)
+        
+        # Send empty eigenvalue data if analysis fails
+        empty_eigenvalue_data = {
+            'real': [],
+            'imag': [],
+            'frequency': [],
+            'damping': [],
+            'electromechanical_modes': []
+        }
+        
+        results['eigenvalues'] = empty_eigenvalue_data
+        serializable_results['eigenvalues'] = empty_eigenvalue_data
 
-        # Debug: print final results summary
-        print("Final serializable_results keys:", serializable_results.keys())
-        print("Final lines power flow:", serializable_results.get('lines'))
+    # --- BUS POWER FLOW CALCULATION ---
+    
+    # Compute bus power flow for each bus using S = V * conj(Ybus * V)
+    try:
+        v_final = sol.v.copy()
+        ybus = getattr(ps, '_y_bus_lf_csr', None)
+        if ybus is None and getattr(ps, 'y_bus_lf', None) is not None:
+            ybus = scipy.sparse.csr_matrix(ps.y_bus_lf)
+        if ybus is not None:
+            s_bus = v_final * np.conj(ybus @ v_final)
+            # Convert the real and imaginary parts to Python floats in one pass each
+            bus_power = [
+                {'p': p, 'q': q}
+                for p, q in zip(s_bus.real.tolist(), s_bus.imag.tolist())
+            ]
+            serializable_results['bus_power'] = bus_power
+    except Exception as e:
+        logger.error("Error computing bus power flow: %s", e)
 
-        # Add original bus power injections for comparison
-        try:
-            serializable_results['bus_power_raw'] = [str(s) for s in ps.s_0]
-        except Exception as e:
-            print('Error serializing ps.s_0:', e)
+    # Debug: log final results summary
+    logger.debug("Final serializable_results keys: %s", serializable_results.keys())
+    logger.debug("Final lines power flow: %s", serializable_results.get('lines'))
 
-        # ---------------------------------------------------------------
-        # FINALIZE SIMULATION
-        # ---------------------------------------------------------------
+    # Add original bus power injections for comparison
+    try:
+        serializable_results['bus_power_raw'] = [str(s) for s in ps.s_0]
+    except Exception as e:
+        logger.error('Error serializing ps.s_0: %s', e)
+
+    # ---------------------------------------------------------------
+    # FINALIZE SIMULATION
+    # ---------------------------------------------------------------
+    
+    # Calculate and log total simulation time
+    end_time = time.time()
+    total_time = end_time - start_time
+    logger.info("Simulation completed in %.2f seconds", total_time)
+    
+    # Log final bus power injections for reference, capped so large networks are not formatted in full
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Power flow bus injection results (ps.s_0): %s",
+                     np.array2string(np.asarray(ps.s_0), threshold=20))
+    
+    return serializable_results
+
+
+def run_simulation_thread(sim_params):
+    """
+    Main simulation function that runs in a separate thread.
+    
+    Runs the simulation with the event parameters in sim_parameters and sends
+    the updates and results to the frontend through the update broker.
+    
+    Args:
+        sim_params: Dictionary containing all simulation parameters
+    """
+    global simulation_state
+    finished = False
+    try:
+        logger.info("=== Loading model ===")
+        network_name = sim_params.get('network', 'k2a')
+        try:
+            model = load_network_model(network_name)
+        except ModuleNotFoundError:
+            publish_update({
+                'type': 'error',
+                'data': f"Network {network_name} not found"
+            })
+            finished = True
+            return
         
-        # Calculate and print total simulation time
-        end_time = time.time()
-        total_time = end_time - start_time
-        print(f"\nSimulation completed in {total_time:.2f} seconds")
+        serializable_results = run_simulation(sim_params, sim_parameters, model, publish_update)
         
         # Store final results
         simulation_state['results'] = dict(serializable_results)
         
         # Send completion message with all results
-        update_queue.put({
+        publish_update({
             'type': 'complete',
             'data': serializable_results
         })
-        
-        # Update simulation status
-        simulation_state['running'] = False
-        
-        # Print final bus power injections for reference
-        try:
-            print('Power flow bus injection results (ps.s_0):', ps.s_0)
-        except Exception as e:
-            print('Error printing ps.s_0:', e)
+        finished = True
         
     except Exception as e:
-        print(f"Error in simulation thread: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in simulation thread: %s", e)
         
         # Send error message to frontend
-        update_queue.put({
+        publish_update({
             'type': 'error',
             'data': str(e)
         })
+        finished = True
+    
+    finally:
+        # Runs on every exit path, also when the thread is stopped by an exception that is
+        # not caught above, so the client stream ends and new simulations can be started
+        if not finished:
+            publish_update({
+                'type': 'error',
+                'data': 'Simulation stopped unexpectedly'
+            })
+        simulation_running.clear()
+
+
+def run_batch_scenario(scenario):
+    """
+    Run one scenario of a batch, in a worker process.
+    
+    Args:
+        scenario: Dictionary with network, t_end and the event parameters
+    
+    Returns:
+        Dictionary with 'status' and either 'data' (the results) or 'message'
+    """
+    network_name = scenario.get('network', 'k2a')
+    try:
+        try:
+            model = load_network_model(network_name)
+        except ModuleNotFoundError:
+            return {'status': 'error', 'message': f"Network {network_name} not found"}
+        return {'status': 'success', 'data': run_simulation(scenario, scenario, model)}
+    except Exception as e:
+        logger.exception("Error in batch scenario: %s", e)
+        return {'status': 'error', 'message': str(e)}
+
+
+def get_batch_executor():
+    """Return the process pool for batch simulations, creating it on first use."""
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            # Spawned workers do not inherit the server's threads and locks
+            _batch_executor = ProcessPoolExecutor(
+                max_workers=BATCH_MAX_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'))
+        return _batch_executor
+
+
+def _is_number(value):
+    """True for int and float values, JSON booleans are not accepted as numbers."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_parameters(data):
+    """
+    Check the types of a simulation parameter payload before it is used.
+    
+    Only the keys present in data are checked, payloads may update a subset of
+    the parameters. Unknown keys and values of the wrong type are rejected
+    here instead of failing inside the simulation.
+    
+    Args:
+        data: Parameter dictionary in the format of sim_parameters
+    
+    Returns:
+        Error message, or None if the parameters are valid
+    """
+    if not isinstance(data, dict):
+        return 'Parameters must be a JSON object.'
+
+    unknown = set(data) - set(sim_parameters)
+    if unknown:
+        return f"Unknown parameters: {', '.join(sorted(map(str, unknown)))}."
+
+    if 'network' in data and not isinstance(data['network'], str):
+        return 'network must be a string.'
+    if 't_end' in data and not (_is_number(data['t_end']) and data['t_end'] > 0):
+        return 't_end must be a positive number.'
+
+    for name in ('step1', 'step2', 'shortCircuit', 'lineOutage', 'tapChanger'):
+        if name in data and not isinstance(data[name], dict):
+            return f'{name} must be an object.'
+
+    for name in ('step1', 'step2'):
+        step = data.get(name, {})
+        for key in ('time', 'g_setp', 'b_setp'):
+            if key in step and not _is_number(step[key]):
+                return f'{name}.{key} must be a number.'
+        if 'load_index' in step and not (isinstance(step['load_index'], int)
+                                         and not isinstance(step['load_index'], bool)
+                                         and step['load_index'] >= 0):
+            return f'{name}.load_index must be a non-negative integer.'
+
+    short_circuit = data.get('shortCircuit', {})
+    for key in ('startTime', 'duration', 'admittance'):
+        if key in short_circuit and not _is_number(short_circuit[key]):
+            return f'shortCircuit.{key} must be a number.'
+
+    outages = data.get('lineOutage', {}).get('outages', [])
+    if not isinstance(outages, list) or not all(isinstance(outage, dict) for outage in outages):
+        return 'lineOutage.outages must be a list of objects.'
+    for i, outage in enumerate(outages):
+        if 'time' in outage and not _is_number(outage['time']):
+            return f'Line outage #{i+1} time must be a number.'
+
+    changes = data.get('tapChanger', {}).get('changes', [])
+    if not isinstance(changes, list) or not all(isinstance(change, dict) for change in changes):
+        return 'tapChanger.changes must be a list of objects.'
+    for i, change in enumerate(changes):
+        for key in ('time', 'ratioChange'):
+            if key in change and not _is_number(change[key]):
+                return f'Tap change #{i+1} {key} must be a number.'
+
+    return None
+
+
+def validate_events(data):
+    """
+    Check that the configured events can run, before a simulation is started.
+    
+    Complements validate_parameters, which only checks types: a short circuit
+    or tap change has to name its bus or transformer, and line outages need a
+    time. An empty short circuit busId means no short circuit and is set to
+    None, a numeric string is converted to an integer.
+    
+    Args:
+        data: Parameter dictionary in the format of sim_parameters (updated in place)
+    
+    Returns:
+        Error message, or None if the events are valid
+    """
+    # Validate shortCircuit parameters
+    if 'shortCircuit' in data:
+        if 'busId' in data['shortCircuit']:
+            # If busId is empty but simulation is attempted, provide a clear error
+            if data['shortCircuit']['busId'] == '':
+                # This is a valid case - just no short circuit
+                # Explicitly set it to None/empty to avoid conversion issues later
+                data['shortCircuit']['busId'] = None
+            elif isinstance(data['shortCircuit']['busId'], str):
+                try:
+                    # Try to convert to integer
+                    data['shortCircuit']['busId'] = int(data['shortCircuit']['busId'])
+                except ValueError:
+                    return 'Invalid short circuit bus ID. Please select a valid bus or leave empty for no short circuit.'
         
-        # Update simulation status
-        simulation_state['running'] = False
+        # Check if required short circuit parameters are present when busId is set
+        if data['shortCircuit'].get('busId') and (
+            'startTime' not in data['shortCircuit'] or 
+            'duration' not in data['shortCircuit'] or
+            'admittance' not in data['shortCircuit']
+        ):
+            return 'Short circuit is configured but missing required parameters (startTime, duration, or admittance).'
+    
+    # Validate line outage parameters
+    if 'lineOutage' in data:
+        if data['lineOutage'].get('enabled', False) and 'outages' in data['lineOutage']:
+            for i, outage in enumerate(data['lineOutage']['outages']):
+                if 'lineId' in outage and outage['lineId'] and 'time' not in outage:
+                    return f'Line outage #{i+1} is configured but missing required time parameter.'
+    
+    # Validate transformer tap changer parameters
+    if 'tapChanger' in data and data['tapChanger'].get('enabled') and 'changes' in data['tapChanger']:
+        for i, change in enumerate(data['tapChanger']['changes']):
+            if 'transformerId' not in change or change['transformerId'] == '':
+                return f'Please select a transformer for tap change #{i+1} or disable tap changer functionality.'
+    
+    return None
 
 
 # ========================================================================
@@ -626,18 +1386,24 @@ def set_parameters():
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
+        error = validate_parameters(data)
+        if error:
+            return jsonify({'status': 'error', 'message': error}), 400
 
         # Update simulation parameters
         global sim_parameters
-        # Print received data for debugging
-        print("Received parameters update:", data)
+        # Log received data for debugging
+        logger.debug("Received parameters update: %s", data)
         if 't_end' in data:
-            print("Updating t_end to:", data['t_end'])
+            logger.debug("Updating t_end to: %s", data['t_end'])
         
-        sim_parameters.update(data)
-        print("Updated sim_parameters:", sim_parameters)
+        # Bind a new dict instead of updating the shared one, a running simulation keeps
+        # reading the parameters it was started with
+        parameters = {**sim_parameters, **data}
+        sim_parameters = parameters
+        logger.debug("Updated sim_parameters: %s", parameters)
         
-        return jsonify({'status': 'success', 'parameters': sim_parameters})
+        return jsonify({'status': 'success', 'parameters': parameters})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
@@ -651,78 +1417,87 @@ def start_simulation():
     Validates inputs, then starts the simulation in a separate thread.
     Returns a success status or error message.
     """
-    if simulation_state['running']:
+    if simulation_running.is_set():
         return jsonify({'status': 'error', 'message': 'Simulation already running'}), 400
     
     try:
-        # Clear previous results
-        simulation_state['results'].clear()
-        
         # Get the request data
         data = request.json
         
         # Basic validation of parameters
         if not data:
             return jsonify({'status': 'error', 'message': 'No parameters provided. Please set parameters before running the simulation.'}), 400
+        error = validate_parameters(data)
+        if error:
+            return jsonify({'status': 'error', 'message': error}), 400
         
-        # Validate shortCircuit parameters
-        if 'shortCircuit' in data:
-            if 'busId' in data['shortCircuit']:
-                # If busId is empty but simulation is attempted, provide a clear error
-                if data['shortCircuit']['busId'] == '':
-                    # This is a valid case - just no short circuit
-                    # Explicitly set it to None/empty to avoid conversion issues later
-                    data['shortCircuit']['busId'] = None
-                elif isinstance(data['shortCircuit']['busId'], str):
-                    try:
-                        # Try to convert to integer
-                        data['shortCircuit']['busId'] = int(data['shortCircuit']['busId'])
-                    except ValueError:
-                        return jsonify({
-                            'status': 'error', 
-                            'message': 'Invalid short circuit bus ID. Please select a valid bus or leave empty for no short circuit.'
-                        }), 400
-            
-            # Check if required short circuit parameters are present when busId is set
-            if data['shortCircuit']['busId'] and (
-                'startTime' not in data['shortCircuit'] or 
-                'duration' not in data['shortCircuit'] or
-                'admittance' not in data['shortCircuit']
-            ):
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Short circuit is configured but missing required parameters (startTime, duration, or admittance).'
-                }), 400
-        
-        # Validate line outage parameters
-        if 'lineOutage' in data:
-            if data['lineOutage'].get('enabled', False) and 'outages' in data['lineOutage']:
-                for i, outage in enumerate(data['lineOutage']['outages']):
-                    if 'lineId' in outage and outage['lineId'] and 'time' not in outage:
-                        return jsonify({
-                            'status': 'error',
-                            'message': f'Line outage #{i+1} is configured but missing required time parameter.'
-                        }), 400
+        error = validate_events(data)
+        if error:
+            return jsonify({'status': 'error', 'message': error}), 400
         
-        # Validate transformer tap changer parameters
-        if 'tapChanger' in data and data['tapChanger'].get('enabled') and 'changes' in data['tapChanger']:
-            for i, change in enumerate(data['tapChanger']['changes']):
-                if 'transformerId' not in change or change['transformerId'] == '':
-                    return jsonify({
-                        'status': 'error',
-                        'message': f'Please select a transformer for tap change #{i+1} or disable tap changer functionality.'
-                    }), 400
+        # Claim the simulation, another request may have started one since the check above
+        with _simulation_start_lock:
+            if simulation_running.is_set():
+                return jsonify({'status': 'error', 'message': 'Simulation already running'}), 400
+            simulation_running.set()
         
-        # Start simulation in a separate thread
-        sim_thread = threading.Thread(target=run_simulation_thread, args=(data,))
-        sim_thread.daemon = True
-        sim_thread.start()
+        try:
+            # Clear previous results
+            simulation_state['results'].clear()
+            
+            # Start simulation in a separate thread, clients connecting from now on
+            # only get the updates of this run
+            update_broker.reset()
+            sim_thread = threading.Thread(target=run_simulation_thread, args=(data,))
+            sim_thread.daemon = True
+            sim_thread.start()
+        except Exception:
+            simulation_running.clear()
+            raise
         
         return jsonify({'status': 'success', 'message': 'Simulation started'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    """
+    API endpoint to run several independent simulations in parallel.
+    
+    Expects a JSON payload {'scenarios': [...]}. Each scenario has the same
+    format as the start_simulation payload and may override any of the event
+    parameters, the rest are taken from the current simulation parameters.
+    Blocks until all scenarios are done and returns their results in order, at
+    most BATCH_MAX_SCENARIOS scenarios are accepted per request.
+    """
+    data = request.get_json(silent=True)
+    scenarios = data.get('scenarios') if isinstance(data, dict) else None
+    if not isinstance(scenarios, list) or not scenarios or not all(isinstance(sc, dict) for sc in scenarios):
+        return jsonify({'status': 'error', 'message': 'Expected a non-empty list of scenarios.'}), 400
+    if len(scenarios) > BATCH_MAX_SCENARIOS:
+        return jsonify({'status': 'error',
+                        'message': f'At most {BATCH_MAX_SCENARIOS} scenarios can be run in one batch.'}), 400
+    for i, scenario in enumerate(scenarios):
+        error = validate_parameters(scenario)
+        if error:
+            return jsonify({'status': 'error', 'message': f'Scenario #{i+1}: {error}'}), 400
+
+    # Scenarios are complete parameter sets once merged, check their events like start_simulation does
+    scenarios = [{**copy.deepcopy(sim_parameters), **scenario} for scenario in scenarios]
+    for i, scenario in enumerate(scenarios):
+        error = validate_events(scenario)
+        if error:
+            return jsonify({'status': 'error', 'message': f'Scenario #{i+1}: {error}'}), 400
+
+    try:
+        results = list(get_batch_executor().map(run_batch_scenario, scenarios))
+        return Response(dumps_json({'status': 'success', 'results': results}), mimetype='application/json')
+    except Exception as e:
+        logger.exception("Error running batch: %s", e)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 @app.route('/api/simulation_updates', methods=['GET'])
 def simulation_updates():
     """
@@ -732,38 +1507,80 @@ def simulation_updates():
     Clients can subscribe to this endpoint for real-time updates.
     """
     def generate():
+        updates = update_broker.subscribe()
+        try:
+            yield from stream(updates)
+        finally:
+            update_broker.unsubscribe(updates)
+
+    def stream(updates):
         while True:
             try:
-                # Get update from queue with timeout
-                update = update_queue.get(timeout=1)
+                # Take every update that is pending for this client
+                pending = updates.take(timeout=SSE_KEEPALIVE_SEC)
+                if not pending:
+                    # No update available, send keepalive
+                    yield SSE_KEEPALIVE
+                    continue
                 
-                # Convert update data to JSON
-                if isinstance(update.get('data'), (dict, list)):
-                    update_json = json.dumps(update)
-                else:
-                    update_json = json.dumps({
-                        'type': update.get('type', 'unknown'),
-                        'data': str(update.get('data', ''))
-                    })
+                # The stream ends with the first complete or error update
+                end = next((i for i, update in enumerate(pending)
+                            if update['type'] in ('complete', 'error')), None)
+                if end is not None:
+                    pending = pending[:end + 1]
                 
-                yield f"data: {update_json}\n\n"
+                # Send them in the same write
+                yield b"".join(update['frame'] for update in pending)
                 
                 # End stream if simulation is complete or has error
-                if update['type'] in ['complete', 'error']:
+                if end is not None:
                     break
-                    
-            except queue.Empty:
-                # No update available, send keepalive
-                yield ": keepalive\n\n"
                 
             except Exception as e:
-                print(f"Error in SSE generation: {e}")
-                yield f"data: {json.dumps({'type': 'error', 'data': str(e)})}\n\n"
+                logger.exception("Error in SSE generation: %s", e)
+                yield SSE_ERROR_FRAME
                 break
     
-    return Response(generate(), mimetype='text/event-stream')
+    # Compress the stream for clients that accept it, browsers decode gzip-encoded event streams
+    use_gzip = request.accept_encodings['gzip'] > 0
+    response = Response(gzip_stream(generate()) if use_gzip else generate(), mimetype='text/event-stream',
+                        direct_passthrough=True)  # Frames are already bytes, pass them to the server unchanged
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    # Keep caches and reverse proxies (nginx) from holding back events. Connection and
+    # Transfer-Encoding are hop-by-hop headers that only the server may set.
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 # APPLICATION ENTRY POINT
 
 if __name__ == '__main__':
-    app.run(debug=True, port=8000, host='127.0.0.1') 
\ No newline at end of file
+    # Development mode (Flask debugger and debug logging) is opt-in with FLASK_DEBUG=1
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    logging.basicConfig(level=logging.DEBUG if debug else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    # Load and initialize the default network in the background, so the first
+    # simulation request finds it in the caches. This only happens when the app is
+    # started with python app.py, under gunicorn the first request fills the caches.
+    def warm_caches():
+        network_name = sim_parameters['network']
+        try:
+            get_power_system(network_name, load_network_model(network_name))
+        except Exception:
+            logger.warning("Could not preload network %s", network_name, exc_info=True)
+
+    threading.Thread(target=warm_caches, daemon=True).start()
+
+    try:
+        from waitress import serve
+    except ImportError:  # waitress is optional, fall back to the threaded Flask server
+        serve = None
+
+    if serve is not None and not debug:
+        serve(app, host='127.0.0.1', port=8000, threads=8)
+    else:
+        # No reloader, it runs the module twice and a reload drops a running simulation
+        app.run(debug=debug, port=8000, host='127.0.0.1', threaded=True, use_reloader=False) 
\ No newline at end of file